@@ -16,7 +16,7 @@ setup_params = dict(
     long_description=long_description,
     url="https://yougov.kilnhg.com/Code/Repositories/support/yg-projects",
     packages=setuptools.find_packages(),
-    namespace_packages=['yg'],
+    python_requires='>=3.7',
     setup_requires=[
         'hgtools',
         'pytest-runner',
@@ -31,10 +31,7 @@ setup_params = dict(
     ),
     classifiers = [
         "Development Status :: 5 - Production/Stable",
-        "Programming Language :: Python :: 3.2",
-        "Programming Language :: Python :: 3.3",
-        "Programming Language :: Python :: 3.4",
-        "Programming Language :: Python :: 3.5",
+        "Programming Language :: Python :: 3.7",
     ],
     install_requires = [
         'requests',
@@ -0,0 +1,52 @@
+from yg.projects import commands
+from yg.projects.models import (
+    Projects, Project, DistributionTemplate, ResolvedDistribution,
+)
+
+
+def catalog(*extra):
+    return Projects([
+        Project(name='Gryphon', id='a1'),
+        Project(name='Datum', id='b1'),
+    ] + list(extra))
+
+
+def entry_class(filename):
+    class MyTimeEntry(commands.TimeEntry):
+        distribution = DistributionTemplate(Gryphon=6, Datum=4)
+        distribution_file = filename
+    return MyTimeEntry
+
+
+def test_resolution_saved_across_runs(tmpdir, monkeypatch):
+    filename = str(tmpdir / 'distribution.json')
+    first = entry_class(filename).get_project_distribution(catalog())
+    assert ResolvedDistribution.load(filename) == first
+
+    # a later run, with a freshly downloaded catalog, does no searching
+    def best(self, name):
+        raise AssertionError("resolved {name!r} again".format(**vars()))
+    monkeypatch.setattr(Projects, 'best', best)
+    again = entry_class(filename).get_project_distribution(catalog())
+    assert again == first
+    monkeypatch.undo()
+
+    changed = catalog(Project(name='Gryphon 4', id='c1'))
+    entry_class(filename).get_project_distribution(changed)
+    assert ResolvedDistribution.load(filename).is_current(
+        changed, entry_class(filename).distribution)
+
+
+def test_changed_template_resolved_afresh(tmpdir):
+    filename = str(tmpdir / 'distribution.json')
+    entry_class(filename).get_project_distribution(catalog())
+    cls = entry_class(filename)
+    cls.distribution = DistributionTemplate(Gryphon=1)
+    assert cls.get_project_distribution(catalog()) == {'a1 Gryphon': 1}
+
+
+def test_unreadable_file_ignored(tmpdir):
+    filename = tmpdir / 'distribution.json'
+    filename.write('not json')
+    dist = entry_class(str(filename)).get_project_distribution(catalog())
+    assert dist == {'a1 Gryphon': 6, 'b1 Datum': 4}
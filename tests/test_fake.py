@@ -0,0 +1,202 @@
+import json
+import argparse
+import time
+import datetime
+import urllib.request
+import urllib.error
+import concurrent.futures
+
+import pytest
+
+import yg.netsuite
+from yg.netsuite_fake import FakeNetSuite
+
+
+def call(fake, path, method='GET', data=None):
+    body = None if data is None else json.dumps(data).encode('utf-8')
+    req = urllib.request.Request(fake.url + path, data=body, method=method)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            text = resp.read().decode('utf-8')
+            return resp.status, text and json.loads(text)
+    except urllib.error.HTTPError as err:
+        return err.code, json.loads(err.read().decode('utf-8'))
+
+
+def timebill(n=1):
+    entry = dict(trandate='May 14, 2014', customer='SmartTech : Gryphon',
+        casetaskevent='', hours=8, memo='')
+    return dict(timebill=[entry] * n)
+
+
+restlet = yg.netsuite.TimeBill.restlet
+
+
+def test_create_search_delete():
+    with FakeNetSuite() as fake:
+        status, res = call(fake, restlet, 'POST', timebill(2))
+        assert res['status'] == 'success'
+        path = yg.netsuite.TimeBill.param_url(date='May 14, 2014')
+        status, items = call(fake, path)
+        assert len(items) == 2
+        path = yg.netsuite.TimeBill.param_url(id=items[0]['id'])
+        assert call(fake, path, 'DELETE') == (200, '')
+        assert len(fake.timebills) == 1
+
+
+def test_validation_mirrors_restlet():
+    with FakeNetSuite() as fake:
+        data = timebill()
+        data['timebill'][0].update(customer='', hours=0)
+        del data['timebill'][0]['trandate']
+        status, res = call(fake, restlet, 'POST', data)
+        assert res['status'] == 'fail'
+        assert "Invalid date: 'undefined'" in res['message']
+        assert 'Customer entry cannot be blank' in res['message']
+        assert 'Hours cannot be blank' in res['message']
+        assert not fake.timebills
+
+
+def test_iso_date_accepted():
+    with FakeNetSuite() as fake:
+        data = timebill()
+        data['timebill'][0].update(trandate='2014-05-14')
+        status, res = call(fake, restlet, 'POST', data)
+        assert res['status'] == 'success'
+        record, = fake.timebills.values()
+        assert record['trandate'] == datetime.date(2014, 5, 14)
+
+
+def test_empty_batch():
+    with FakeNetSuite() as fake:
+        assert call(fake, restlet, 'POST', timebill(0)) == (
+            200, dict(status='success'))
+
+
+def test_unexpected_error_reported():
+    with FakeNetSuite() as fake:
+        req = urllib.request.Request(fake.url + restlet, data=b'{',
+            method='POST')
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(req)
+        assert exc.value.code == 500
+        error = json.loads(exc.value.read().decode('utf-8'))['error']
+        assert error['code'] == 'UNEXPECTED_ERROR'
+
+
+def test_governance_limit():
+    with FakeNetSuite(governance=300) as fake:
+        status, res = call(fake, restlet, 'POST', timebill(11))
+        assert status == 400
+        assert res['error']['code'] == 'SSS_USAGE_LIMIT_EXCEEDED'
+
+
+def test_error_rate_repeatable():
+    def codes():
+        with FakeNetSuite(error_rate=0.5, seed=42) as fake:
+            return [call(fake, yg.netsuite.Projects.path)[0]
+                for n in range(20)]
+    first = codes()
+    assert 500 in first and 200 in first
+    assert codes() == first
+
+
+def test_throttling():
+    with FakeNetSuite(latency=0.2, max_concurrent=2) as fake:
+        with concurrent.futures.ThreadPoolExecutor(6) as pool:
+            calls = [pool.submit(call, fake, yg.netsuite.Projects.path)
+                for n in range(6)]
+            statuses = [future.result()[0] for future in calls]
+        assert statuses.count(429) == fake.stats['throttled'] > 0
+
+
+def test_fan_out_scales():
+    """
+    With injected latency, concurrent requests should complete in a
+    fraction of the serial time.
+    """
+    with FakeNetSuite(latency=0.05) as fake:
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda n: call(fake, yg.netsuite.Projects.path),
+                range(16)))
+        elapsed = time.perf_counter() - start
+    serial = 16 * 0.05
+    assert elapsed < serial / 2
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    monkeypatch.setattr(yg.netsuite, 'root', yg.netsuite.root)
+    monkeypatch.setattr(yg.netsuite, 'system', yg.netsuite.system)
+    with FakeNetSuite() as fake:
+        yg.netsuite.Fake.use(fake)
+        yield fake
+
+
+def test_timebill_round_trip(fake_env):
+    day = datetime.date(2014, 5, 14)
+    tb = yg.netsuite.TimeBill([
+        yg.netsuite.Entry(date=day, customer='SmartTech : Gryphon', hours=8),
+    ])
+    assert tb.submit()['status'] == 'success'
+    assert len(fake_env.timebills) == 1
+    yg.netsuite.TimeBill.clear_for_date(day)
+    assert not fake_env.timebills
+    assert yg.netsuite.system.endswith('Fake')
+
+
+def test_projects_load(fake_env):
+    projects = yg.netsuite.Projects.load()
+    assert [project.entityid for project in projects] == ['Gryphon', 'Datum']
+
+
+def test_offered_to_commands(monkeypatch):
+    monkeypatch.setattr(yg.netsuite, 'root', yg.netsuite.root)
+    monkeypatch.setattr(yg.netsuite, 'system', yg.netsuite.system)
+    from yg.projects import commands
+    parser = argparse.ArgumentParser()
+    yg.netsuite.Fake.offer(parser)
+    args = parser.parse_args(['--fake'])
+    try:
+        assert yg.netsuite.root == args.fake.url
+        projects = commands.load_catalog(args.fake)
+        assert str(projects.Gryphon) == '1 Gryphon'
+    finally:
+        args.fake.stop()
+
+
+def test_entry_validated_against_catalog(fake_env, monkeypatch, capsys):
+    from yg.projects import commands
+    monday = datetime.date(2014, 5, 12)
+    tb = yg.netsuite.TimeBill([
+        yg.netsuite.Entry(date=monday, customer='1 Gryphon', hours=8),
+        yg.netsuite.Entry(date=monday, customer='Bogus', hours=1),
+    ])
+    monkeypatch.setattr(yg.netsuite.TimeBill, 'solicit', lambda: tb)
+    monkeypatch.setattr(yg.netsuite.Credential, 'install', lambda self: None)
+    with pytest.raises(SystemExit) as exc:
+        commands.InteractiveEntry.submit_time(fake=fake_env)
+    assert exc.value.code == 1
+    assert "Unknown customer 'Bogus'" in capsys.readouterr().out
+    assert not fake_env.timebills
+
+
+def test_weekend_entry_submitted(fake_env, monkeypatch, capsys):
+    from yg.projects import commands
+    saturday = datetime.date(2014, 5, 17)
+    tb = yg.netsuite.TimeBill([
+        yg.netsuite.Entry(date=saturday, customer='SmartTech : Gryphon',
+            hours=4),
+    ])
+    monkeypatch.setattr(yg.netsuite.TimeBill, 'solicit', lambda: tb)
+    login = dict(email='jason@example.com', password='secret')
+    session = yg.netsuite.session._load()
+    monkeypatch.setattr(session, 'headers', dict(session.headers))
+    monkeypatch.setattr(yg.netsuite.Credential, '__init__',
+        lambda self: vars(self).update(login))
+    commands.InteractiveEntry.submit_time(fake=fake_env)
+    assert "Not a working day (warning)" in capsys.readouterr().out
+    record, = fake_env.timebills.values()
+    assert record['customer'] == 'SmartTech : Gryphon'
+    assert record['employee'] == 'jason@example.com'
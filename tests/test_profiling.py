@@ -0,0 +1,54 @@
+import pstats
+import tracemalloc
+import argparse
+
+from yg.projects.profiling import Profile
+
+
+def test_memory_and_dump(tmpdir):
+    parser = argparse.ArgumentParser()
+    Profile.offer(parser)
+    dump = str(tmpdir / 'run.prof')
+    args = parser.parse_args(['--profile-memory', '--profile-dump', dump])
+    profile = Profile()
+    profile.start(args)
+    try:
+        with profile.phase('allocate'):
+            data = [bytes(1024) for n in range(1000)]
+    finally:
+        profile.stop()
+    (name, elapsed, peak), = profile.phases
+    assert peak >= 1024 * 1000
+    assert pstats.Stats(dump).total_calls
+    assert profile.overhead == ['tracemalloc', 'cProfile']
+
+
+def test_wall_time_untraced():
+    parser = argparse.ArgumentParser()
+    Profile.offer(parser)
+    profile = Profile()
+    profile.start(parser.parse_args(['--profile']))
+    with profile.phase('quiet'):
+        assert not tracemalloc.is_tracing()
+    profile.stop()
+    (name, elapsed, peak), = profile.phases
+    assert peak is None
+    assert not profile.overhead
+
+
+def test_peak_per_phase():
+    parser = argparse.ArgumentParser()
+    Profile.offer(parser)
+    profile = Profile()
+    profile.start(parser.parse_args(['--profile-memory']))
+    try:
+        with profile.phase('allocate'):
+            data = bytes(1024 * 1000)
+        with profile.phase('quiet'):
+            pass
+    finally:
+        profile.stop()
+    (_, _, allocated), (_, _, quiet) = profile.phases
+    assert allocated >= 1024 * 1000
+    assert quiet < 1024 * 100
+    del data
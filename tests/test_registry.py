@@ -0,0 +1,33 @@
+import datetime
+
+from yg.projects.calendar import Registry, DateRange
+from yg.projects.models import Distribution
+
+
+calls = []
+
+
+class Weekdays:
+    hours_per_day = 8
+
+    def is_working_day(self, day):
+        calls.append(day)
+        return day.weekday() < 5
+
+
+class UK(Weekdays):
+    hours_per_day = 7.5
+
+
+def test_create_timebills_one_pass_per_calendar():
+    us, uk = Weekdays(), UK()
+    people = ['us{n}'.format(n=n) for n in range(10)]
+    reg = Registry(dict.fromkeys(people, us), amy=uk)
+    dist = Distribution(Gryphon=1)
+    may = DateRange(datetime.date(2014, 5, 1), datetime.date(2014, 6, 1))
+    del calls[:]
+    tbs = reg.create_timebills(dict.fromkeys(reg, dist), may)
+    assert len(calls) == 2 * 31
+    assert len(tbs['us0']) == len(tbs['amy']) == 22
+    assert tbs['us0'][0].hours == 8
+    assert tbs['amy'][0].hours == 7.5
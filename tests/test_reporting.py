@@ -0,0 +1,131 @@
+import datetime
+
+import yg.netsuite
+from yg.netsuite_fake import FakeNetSuite
+from yg.projects.reporting import Report
+
+
+class StubSearch:
+    """
+    Stand in for TimeBill.search, recording the windows requested.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, start, end, modified_since=None):
+        self.calls.append((start, end, modified_since))
+        rows = self.rows
+        if modified_since:
+            rows = [row for row in rows if row.get('changed')]
+        return [
+            row for row in rows
+            if start.isoformat() <= row['date'] < end.isoformat()
+        ]
+
+
+def row(id, date, hours=8, **kwargs):
+    return dict(id=id, date=date, customer='Gryphon', casetaskevent='',
+        employee='Jason', hours=hours, **kwargs)
+
+
+may = datetime.date(2014, 5, 1), datetime.date(2014, 6, 1)
+
+
+def test_refresh_is_incremental():
+    search = StubSearch([row('1', '2014-05-12'), row('2', '2014-05-20')])
+    report = Report(search=search)
+    report.refresh(*may)
+    # each week in May fetched once
+    assert len(search.calls) == 5
+    assert len(report.store) == 2
+
+    del search.calls[:]
+    search.rows = [
+        row('1', '2014-05-12'),
+        row('2', '2014-05-20', hours=4, changed=True),
+    ]
+    report.refresh(*may)
+    # one query for changes, then only the week that changed
+    windows = [start for start, end, since in search.calls if not since]
+    assert windows == [datetime.date(2014, 5, 19)]
+    assert report.store.group_by('customer') == {('Gryphon',): 12.0}
+
+
+class Calendar:
+    hours_per_day = 8
+
+    def is_working_day(self, day):
+        return day.weekday() < 5
+
+
+def test_refresh_replaces_in_one_pass(monkeypatch):
+    search = StubSearch([row('1', '2014-05-12'), row('2', '2014-05-20')])
+    report = Report(search=search)
+    calls = []
+    replace_ranges = report.store.replace_ranges
+    monkeypatch.setattr(report.store, 'replace_ranges',
+        lambda ranges, rows: calls.append(ranges) or replace_ranges(
+            ranges, rows))
+    report.refresh(*may)
+    assert len(calls) == 1
+    assert len(calls[0]) == 5
+    assert report.store.group_by('date') == {
+        (datetime.date(2014, 5, 12),): 8.0,
+        (datetime.date(2014, 5, 20),): 8.0,
+    }
+
+
+def test_utilization():
+    search = StubSearch([row('1', '2014-05-12'), row('2', '2014-05-13')])
+    report = Report(search=search)
+    week = datetime.date(2014, 5, 12), datetime.date(2014, 5, 19)
+    report.refresh(*week)
+    assert report.store.utilization(Calendar(), *week) == {'Jason': 0.4}
+
+
+def test_search_pages(monkeypatch):
+    monkeypatch.setattr(yg.netsuite, 'root', yg.netsuite.root)
+    monkeypatch.setattr(yg.netsuite, 'system', yg.netsuite.system)
+    monkeypatch.setattr(FakeNetSuite, 'page_size', 3)
+    day = datetime.date(2014, 5, 14)
+    with FakeNetSuite() as fake:
+        yg.netsuite.Fake.use(fake)
+        yg.netsuite.TimeBill(
+            yg.netsuite.Entry(date=day, customer='Gryphon', hours=1)
+            for n in range(7)
+        ).submit()
+        monkeypatch.setattr(yg.netsuite.TimeBill, 'page_size', 3)
+        rows = yg.netsuite.TimeBill.search(*may)
+    assert len(rows) == 7
+    assert len({row['id'] for row in rows}) == 7
+
+
+def test_utilization_without_working_days():
+    search = StubSearch([row('1', '2014-05-17')])
+    report = Report(search=search)
+    weekend = datetime.date(2014, 5, 17), datetime.date(2014, 5, 19)
+    report.refresh(*weekend)
+    assert report.store.utilization(Calendar(), *weekend) == {}
+
+
+def test_modified_since_is_absolute(monkeypatch):
+    monkeypatch.setattr(yg.netsuite, 'root', yg.netsuite.root)
+    monkeypatch.setattr(yg.netsuite, 'system', yg.netsuite.system)
+    hawaii = datetime.timezone(datetime.timedelta(hours=-10))
+    minute = datetime.timedelta(minutes=1)
+    day = datetime.date(2014, 5, 14)
+    with FakeNetSuite() as fake:
+        yg.netsuite.Fake.use(fake)
+        report = Report()
+        report.refresh(*may)
+        assert not len(report.store)
+        yg.netsuite.TimeBill([
+            yg.netsuite.Entry(date=day, customer='Gryphon', hours=3),
+        ]).submit()
+        now = datetime.datetime.now(hawaii)
+        search = yg.netsuite.TimeBill.search
+        assert len(search(*may, modified_since=now - minute)) == 1
+        assert not search(*may, modified_since=now + minute)
+        report.refresh(*may)
+    assert report.store.group_by('date') == {(day,): 3.0}
@@ -0,0 +1,26 @@
+import pytest
+
+from yg.projects.models import Projects, Project
+
+
+def test_index_reused_until_mutated():
+    ps = Projects([
+        Project(name='Gryphon', id='a1'),
+        Project(name='Datum Omnibus', id='b1'),
+    ])
+    index = ps.index
+    ps.search('gry')
+    assert ps.index is index
+    ps.append(Project(name='Gryphon 4', id='c1'))
+    assert ps.index is not index
+    assert [p.id for p in ps.search('gryphon')] == ['a1', 'c1']
+
+
+def test_probing_skips_index():
+    ps = Projects([Project(name='Gryphon', id='a1')])
+    assert not hasattr(ps, 'Griphon')
+    assert getattr(ps, '__wrapped__', None) is None
+    assert '_index' not in vars(ps)
+    with pytest.raises(AttributeError) as exc:
+        ps.Griphon
+    assert 'did you mean a1 Gryphon' in str(exc.value)
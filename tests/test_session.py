@@ -0,0 +1,27 @@
+import threading
+
+import yg.netsuite
+from yg.netsuite import LazySession
+from yg.netsuite_fake import FakeNetSuite
+
+
+def test_get_through_proxy():
+    with FakeNetSuite() as fake:
+        session = LazySession()
+        resp = session.get(fake.url + yg.netsuite.Projects.path)
+        assert resp.ok
+        assert session.headers['Content-Type'] == 'application/json'
+
+
+def test_constructed_once_across_threads():
+    session = LazySession()
+    loaded = []
+    threads = [
+        threading.Thread(target=lambda: loaded.append(session._load()))
+        for n in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(map(id, loaded))) == 1
@@ -0,0 +1,62 @@
+"""
+Startup benchmark for the command entry points.
+
+Each module is imported in a fresh interpreter, which must neither pull in
+the heavy dependencies nor exceed its import-time budget.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+heavy_modules = [
+    'requests',
+    'keyring',
+    'dateutil',
+    'workalendar',
+    'jaraco.util',
+    'pkg_resources',
+]
+
+budgets = {
+    'yg.projects.commands': 0.15,
+    'yg.projects.calendar': 0.1,
+    'yg.netsuite': 0.1,
+}
+"Import time budget, in seconds, for each module"
+
+probe = """
+import sys, time, json
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps(dict(elapsed=elapsed, modules=list(sys.modules))))
+"""
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    cmd = [sys.executable, '-c', probe.format(module=module)]
+    out = subprocess.check_output(cmd, cwd=project_root)
+    return json.loads(out.decode('utf-8'))
+
+
+@pytest.mark.parametrize('module', sorted(budgets))
+def test_no_heavy_imports(module):
+    loaded = measure(module)['modules']
+    is_heavy = lambda name: any(
+        name == heavy or name.startswith(heavy + '.')
+        for heavy in heavy_modules
+    )
+    assert not list(filter(is_heavy, loaded))
+
+
+@pytest.mark.parametrize('module', sorted(budgets))
+def test_import_budget(module):
+    # take the best of several runs to discount a cold filesystem
+    elapsed = min(measure(module)['elapsed'] for n in range(3))
+    assert elapsed < budgets[module]
@@ -67,6 +67,12 @@ function validateTimeBills(data_in) {
 }
 
 function GetTimebills(data_in) {
+    // Search actual time. Supply 'date' for a single day or 'start' and
+    // 'end' for a range (end exclusive). 'modified_since' (UTC, as
+    // "YYYY-MM-DD HH:MM:SS") limits results to those changed after that
+    // time. Results are returned in pages of up to 1000 ordered by id;
+    // pass the last id seen as 'after_id' for the next page. When 'columns' is set, each result is rendered as a
+    // plain object of its values.
     var filters = new Array();
     var filter = new nlobjSearchFilter('type', null, 'is', 'A');
     filters.push(filter);
@@ -76,10 +82,69 @@ function GetTimebills(data_in) {
         var filter = new nlobjSearchFilter('date', null, 'on', date);
         filters.push(filter);
     }
-    // var columns = new Array();
-    // columns.push(new nlobjSearchColumn('type'));
-    var results = nlapiSearchRecord('timebill', null, filters);
-    return results;
+    if(data_in.start) {
+        var start = nlapiDateToString(new Date(data_in.start), "date");
+        filters.push(new nlobjSearchFilter('date', null, 'onorafter', start));
+    }
+    if(data_in.end) {
+        var end = nlapiDateToString(new Date(data_in.end), "date");
+        filters.push(new nlobjSearchFilter('date', null, 'before', end));
+    }
+    if(data_in.modified_since) {
+        // modified_since is UTC; render it in the server's timezone, in
+        // which the filter is compared.
+        var since = nlapiDateToString(parseUTC(data_in.modified_since), "datetime");
+        filters.push(new nlobjSearchFilter('lastmodifieddate', null, 'after', since));
+    }
+    if(data_in.after_id) {
+        filters.push(new nlobjSearchFilter('internalidnumber', null, 'greaterthan', data_in.after_id));
+    }
+    if(!data_in.columns) {
+        return nlapiSearchRecord('timebill', null, filters);
+    }
+    var columns = new Array();
+    columns.push(new nlobjSearchColumn('internalid').setSort());
+    columns.push(new nlobjSearchColumn('date'));
+    columns.push(new nlobjSearchColumn('customer'));
+    columns.push(new nlobjSearchColumn('casetaskevent'));
+    columns.push(new nlobjSearchColumn('employee'));
+    columns.push(new nlobjSearchColumn('hours'));
+    var results = nlapiSearchRecord('timebill', null, filters, columns) || [];
+    var rows = new Array();
+    for (var i = 0; i < results.length; i++) {
+        var result = results[i];
+        var date = nlapiStringToDate(result.getValue('date'));
+        rows.push({
+            id: result.getId(),
+            date: formatISODate(date),
+            customer: result.getText('customer'),
+            casetaskevent: result.getText('casetaskevent'),
+            employee: result.getText('employee'),
+            hours: parseDuration(result.getValue('hours'))
+        });
+    }
+    return rows;
+}
+
+function parseUTC(value) {
+    // parse "YYYY-MM-DD HH:MM:SS" in UTC
+    var parts = String(value).split(/[- :]/);
+    var n = function(i) { return parseInt(parts[i], 10); };
+    return new Date(Date.UTC(n(0), n(1) - 1, n(2), n(3), n(4), n(5)));
+}
+
+function formatISODate(date) {
+    var pad = function(n) { return n < 10 ? '0' + n : '' + n; };
+    return date.getFullYear() + '-' + pad(date.getMonth() + 1) + '-' + pad(date.getDate());
+}
+
+function parseDuration(value) {
+    // hours may be rendered as "7:30" or "7.5"
+    var parts = String(value).split(':');
+    if (parts.length == 2) {
+        return parseInt(parts[0], 10) + parseInt(parts[1], 10) / 60;
+    }
+    return parseFloat(value);
 }
 
 function DeleteTimebills(data_in) {
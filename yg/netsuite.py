@@ -8,10 +8,7 @@ import logging
 import urllib.parse
 import datetime
 import argparse
-
-import dateutil.parser
-import requests
-import keyring
+import threading
 
 log = logging.getLogger()
 
@@ -19,8 +16,38 @@ root = 'https://rest.netsuite.com'
 ns_url = lambda path: urllib.parse.urljoin(root, path)
 system = "NetSuite"
 
-session = requests.session()
-session.headers = {'Content-Type': 'application/json'}
+
+class LazySession:
+    """
+    A stand-in for the module's requests session. The requests package
+    is imported and the session constructed only on first use, so
+    importing this module (e.g. to render --help) stays cheap.
+
+    >>> lazy = LazySession()
+    >>> lazy._session is None
+    True
+    """
+    _session = None
+    _lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            # don't trigger the import for introspection (copy, doctest)
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def _load(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    session = requests.session()
+                    session.headers = {'Content-Type': 'application/json'}
+                    self._session = session
+        return self._session
+
+
+session = LazySession()
 
 
 class Sandbox:
@@ -46,6 +73,38 @@ class Sandbox:
         root = root.replace('rest.netsuite', 'rest.sandbox.netsuite')
 
 
+class Fake:
+    """
+    Like Sandbox, but directs requests to a FakeNetSuite (see
+    yg.netsuite_fake) running locally.
+    """
+    @classmethod
+    def offer(cls, parser):
+        """
+        Given an argparse parser, add a --fake parameter which starts a
+        FakeNetSuite and directs requests to it. The fake is imported only
+        when requested, and is stored on the parsed args as ``fake``.
+        """
+        class FakeAction(argparse.Action):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, nargs=0, **kwargs)
+
+            def __call__(self, parser, namespace, values, option_string=None):
+                from yg.netsuite_fake import FakeNetSuite
+                fake = FakeNetSuite().start()
+                cls.use(fake)
+                setattr(namespace, self.dest, fake)
+
+        parser.add_argument('--fake', action=FakeAction, default=None,
+            help="Run against a local fake NetSuite")
+
+    @staticmethod
+    def use(fake):
+        global system, root
+        system += ' Fake'
+        root = fake.url
+
+
 class NetSuite:
     """
     Common NetSuite functionality
@@ -86,6 +145,21 @@ class NetSuite:
         """
         return date.strftime('%B %d, %Y')
 
+    @staticmethod
+    def format_datetime(dt):
+        """
+        Render a datetime.datetime as UTC, for parseUTC in timesheets.js.
+        Naive datetimes are taken to be local time. Sending UTC keeps the
+        time independent of the client's and the account's timezones.
+
+        >>> eastern = datetime.timezone(datetime.timedelta(hours=-4))
+        >>> dt = datetime.datetime(2014, 5, 14, 9, 5, tzinfo=eastern)
+        >>> NetSuite.format_datetime(dt)
+        '2014-05-14 13:05:00'
+        """
+        utc = dt.astimezone(datetime.timezone.utc)
+        return utc.strftime('%Y-%m-%d %H:%M:%S')
+
     @classmethod
     def param_url(cls, **data):
         params = urllib.parse.urlencode(data)
@@ -99,6 +173,7 @@ class Credential(NetSuite):
             "nlauth_signature={password}, nlauth_role={role}")
 
     def __init__(self):
+        import keyring
         self.email = os.environ.get('NETSUITE_EMAIL', None) or input("email> ")
         password = keyring.get_password(system, self.email)
         if not password:
@@ -151,6 +226,7 @@ class Credential(NetSuite):
             raise
 
     def reset_password(self, failure):
+        import keyring
         print("password was rejected")
         password = getpass.getpass("new password> ")
         if not password:
@@ -211,6 +287,7 @@ class Entry:
 
     @classmethod
     def solicit(cls):
+        import dateutil.parser
         date_input = input("Date (blank to end)> ")
         if not date_input:
             return
@@ -238,6 +315,9 @@ class TimeBill(NetSuite, list):
     """
     restlet = '/app/site/hosting/restlet.nl?script=522&deploy=1'
 
+    page_size = 1000
+    "The most results NetSuite returns from a single search"
+
     @property
     def json(self):
         return dict(timebill=[entry.json for entry in self])
@@ -249,8 +329,19 @@ class TimeBill(NetSuite, list):
         return cls(entries)
 
     def submit(self):
+        return self.post(self.encode())
+
+    def encode(self):
+        """
+        Render the entries as the JSON payload for submission.
+        """
+        return json.dumps(self.json, default=self.default_encode)
+
+    def post(self, data):
+        """
+        Submit the payload as rendered by encode.
+        """
         log.info("Submitting %s entries.", len(self))
-        data = json.dumps(self.json, default=self.default_encode)
         resp = session.post(ns_url(self.restlet), data=data)
         return self.handle_response(resp)
 
@@ -263,6 +354,30 @@ class TimeBill(NetSuite, list):
         for item in items:
             cls.delete_item(item)
 
+    @classmethod
+    def search(cls, start, end, modified_since=None):
+        """
+        Return the timebills dated on or after start and before end, as
+        dicts of id, date, customer, casetaskevent, employee and hours,
+        fetching successive pages as necessary. If modified_since is
+        supplied, only timebills modified after that time are returned.
+        """
+        params = dict(
+            start=cls.format_date(start),
+            end=cls.format_date(end),
+            columns=1,
+        )
+        if modified_since:
+            params.update(modified_since=cls.format_datetime(modified_since))
+        rows = []
+        while True:
+            resp = session.get(ns_url(cls.param_url(**params)))
+            page = cls.handle_response(resp) or []
+            rows.extend(page)
+            if len(page) < cls.page_size:
+                return rows
+            params.update(after_id=page[-1]['id'])
+
     @classmethod
     def delete_item(cls, search_res):
         path = cls.param_url(id=search_res['id'])
@@ -0,0 +1,425 @@
+"""
+A local fake of the NetSuite restlets used by yg.netsuite, suitable as an
+offline load target for throughput and scaling tests.
+
+>>> with FakeNetSuite(seed=0) as fake:
+...     fake.url.startswith('http://127.0.0.1:')
+True
+"""
+
+import csv
+import io
+import json
+import random
+import datetime
+import itertools
+import threading
+import time
+import urllib.parse
+import http.server
+
+import yg.netsuite
+
+
+def script_id(path):
+    """
+    Return the script id from a restlet path.
+
+    >>> script_id(yg.netsuite.TimeBill.restlet)
+    '522'
+    """
+    query = urllib.parse.urlparse(path).query
+    return urllib.parse.parse_qs(query)['script'][0]
+
+
+class Failure(Exception):
+    """
+    A NetSuite error, rendered as the JSON error document NetSuite returns.
+    """
+    def __init__(self, status, code, message):
+        super().__init__(status, code, message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+    @property
+    def json(self):
+        return dict(error=dict(code=self.code, message=self.message))
+
+
+class FakeNetSuite:
+    """
+    Serve the roles, timebill, projects and resource allocation restlets
+    from memory.
+
+    latency: seconds to delay each response; a (min, max) pair selects a
+    uniformly random delay.
+    error_rate: fraction of requests failing with an unexpected error.
+    max_concurrent: requests in flight beyond this are throttled.
+    governance: usage units available to each restlet invocation.
+    seed: seeds the random number generator for repeatable runs.
+    """
+    usage = dict(create=10, submit=20, search=10, delete=20)
+    "Governance units consumed by each record operation"
+
+    roles = [
+        dict(
+            account=dict(internalId='TSTDRV1', name='Fake'),
+            role=dict(internalId=15, name='Employee Center'),
+        ),
+        dict(
+            account=dict(internalId='1234', name='Fake'),
+            role=dict(internalId=3, name='Administrator'),
+        ),
+    ]
+
+    page_size = yg.netsuite.TimeBill.page_size
+
+    allocation_script = '560'
+    "Resource allocation restlet, as used by demo-add-alloc.py"
+
+    default_projects = [
+        ('Gryphon', 'SmartTech : Gryphon'),
+        ('Datum', 'SmartTech : Datum'),
+    ]
+
+    def __init__(self, latency=0, error_rate=0, max_concurrent=None,
+            governance=5000, seed=None, projects=default_projects):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_concurrent = max_concurrent
+        self.governance = governance
+        self.random = random.Random(seed)
+        self.projects = [
+            dict(id=str(id), recordtype='job',
+                columns=dict(entityid=entityid, altname=altname))
+            for id, (entityid, altname) in enumerate(projects, 1)
+        ]
+        self.timebills = {}
+        self.allocations = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = dict(requests=0, throttled=0, errors=0)
+        self.handlers = {
+            ('GET', script_id(yg.netsuite.TimeBill.restlet)):
+                self.search_timebills,
+            ('POST', script_id(yg.netsuite.TimeBill.restlet)):
+                self.create_timebills,
+            ('DELETE', script_id(yg.netsuite.TimeBill.restlet)):
+                self.delete_timebill,
+            ('GET', script_id(yg.netsuite.Projects.path)):
+                self.load_projects,
+            ('POST', self.allocation_script): self.create_allocation,
+        }
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{host}:{port}'.format(**vars())
+
+    def start(self):
+        handler = type('Handler', (RequestHandler,), dict(fake=self))
+        self.server = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def delay(self):
+        latency = self.latency
+        if isinstance(latency, tuple):
+            with self.lock:
+                latency = self.random.uniform(*latency)
+        time.sleep(latency)
+
+    def admit(self):
+        """
+        Count the request in, failing if throttled or by injected error.
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            if (self.max_concurrent is not None
+                    and self.in_flight >= self.max_concurrent):
+                self.stats['throttled'] += 1
+                raise Failure(429, 'SSS_REQUEST_LIMIT_EXCEEDED',
+                    'Request limit exceeded')
+            if self.random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                raise Failure(500, 'UNEXPECTED_ERROR',
+                    'An unexpected error occurred')
+            self.in_flight += 1
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def handle(self, method, path, headers, body):
+        """
+        Dispatch a request, returning (status, data).
+        """
+        self.admit()
+        try:
+            self.delay()
+            if urllib.parse.urlparse(path).path == '/rest/roles':
+                return 200, self.load_roles(headers)
+            if urllib.parse.urlparse(path).path.endswith('.csv'):
+                return 200, self.catalog()
+            params = dict(urllib.parse.parse_qsl(
+                urllib.parse.urlparse(path).query))
+            handler = self.handlers.get((method, params.get('script')))
+            if not handler:
+                raise Failure(404, 'SSS_INVALID_SCRIPTLET_ID',
+                    'That Suitelet is invalid, disabled, or no longer '
+                    'exists.')
+            data = json.loads(body.decode('utf-8')) if body else {}
+            data.update(params)
+            data.setdefault('employee', self.email(headers))
+            return 200, handler(data, Governance(self.governance))
+        finally:
+            self.release()
+
+    def catalog(self):
+        """
+        Render the projects as the CSV catalog read by
+        yg.projects.models.Projects.from_url.
+        """
+        stream = io.StringIO()
+        writer = csv.writer(stream)
+        writer.writerow(['ID', 'Name', 'Customer'])
+        for project in self.projects:
+            columns = project['columns']
+            writer.writerow(
+                [project['id'], columns['entityid'], columns['altname']])
+        return stream.getvalue()
+
+    @staticmethod
+    def email(headers):
+        """
+        The email address from an NLAuth Authorization header, if any.
+        """
+        auth = headers.get('Authorization') or ''
+        params = dict(
+            part.strip().split('=', 1)
+            for part in auth.replace('NLAuth ', '').split(',')
+            if '=' in part
+        )
+        return params.get('nlauth_email', '')
+
+    def load_roles(self, headers):
+        auth = headers.get('Authorization') or ''
+        if 'nlauth_email=' not in auth:
+            raise Failure(401, 'INVALID_LOGIN_ATTEMPT',
+                'You have entered an invalid email address or password.')
+        return self.roles
+
+    date_formats = (
+        '%B %d, %Y', '%b %d, %Y', '%B %d, %Y %H:%M:%S', '%m/%d/%Y',
+        '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f',
+    )
+    "The forms of date string clients send which Javascript's Date() parses"
+
+    @classmethod
+    def parse_date(cls, value):
+        """
+        Return the date Javascript's Date() constructs from a JSON value,
+        raising ValueError where it would construct an invalid Date.
+
+        >>> FakeNetSuite.parse_date('May 14, 2014')
+        datetime.date(2014, 5, 14)
+        >>> FakeNetSuite.parse_date('2014-05-14')
+        datetime.date(2014, 5, 14)
+        >>> FakeNetSuite.parse_date(0)
+        datetime.date(1970, 1, 1)
+        >>> FakeNetSuite.parse_date('undefined')
+        Traceback (most recent call last):
+        ...
+        ValueError: undefined
+        """
+        if value is None or isinstance(value, (bool, int, float)):
+            # milliseconds since the epoch (null is 0)
+            stamp = float(value or 0) / 1000
+            utc = datetime.timezone.utc
+            return datetime.datetime.fromtimestamp(stamp, utc).date()
+        text = str(value).strip()
+        text = text[:-1] if text.endswith('Z') else text
+        for format in cls.date_formats:
+            try:
+                return datetime.datetime.strptime(text, format).date()
+            except ValueError:
+                pass
+        raise ValueError(value)
+
+    @staticmethod
+    def blank(value):
+        """
+        Is value equal to '' as compared by Javascript's ==?
+
+        >>> [FakeNetSuite.blank(value) for value in ('', 0, 0.0, False)]
+        [True, True, True, True]
+        >>> [FakeNetSuite.blank(value) for value in (None, '0', ' ', 8)]
+        [False, False, False, False]
+        """
+        return value is not None and value in ('', 0, [])
+
+    def validate(self, timebills):
+        """
+        Mirror validateTimeBills in timesheets.js. Absent fields are
+        undefined there: an invalid date, but not equal to ''.
+        """
+        message = ''
+        for timebill in timebills:
+            trandate = timebill.get('trandate', 'undefined')
+            try:
+                self.parse_date(trandate)
+            except ValueError:
+                message += ("Invalid date: '{trandate}' (must be a "
+                    "Javascript Date)\n").format(**vars())
+            if self.blank(timebill.get('customer')):
+                message += "Customer entry cannot be blank.'\n"
+            if self.blank(timebill.get('hours')):
+                message += "Hours cannot be blank.'\n"
+        return message
+
+    def create_timebills(self, data, governance):
+        timebills = data.get('timebill', [])
+        message = self.validate(timebills)
+        if message:
+            return dict(status='fail', message=message)
+        result = dict(status='success')
+        for timebill in timebills:
+            governance.consume(self.usage['create'] + self.usage['submit'])
+            record = dict(timebill,
+                trandate=self.parse_date(timebill['trandate']),
+                employee=data['employee'],
+                modified=datetime.datetime.now(datetime.timezone.utc),
+            )
+            with self.lock:
+                timebill_id = str(next(self.ids))
+                self.timebills[timebill_id] = record
+            result.update(timebill_id=timebill_id)
+        # an empty batch succeeds with no timebill_id (undefined in JS)
+        return result
+
+    def search_timebills(self, data, governance):
+        """
+        Mirror GetTimebills in timesheets.js.
+        """
+        governance.consume(self.usage['search'])
+        parse = lambda key: data.get(key) and self.parse_date(data[key])
+        date, start, end = parse('date'), parse('start'), parse('end')
+        since = data.get('modified_since') and datetime.datetime.strptime(
+            data['modified_since'], '%Y-%m-%d %H:%M:%S',
+        ).replace(tzinfo=datetime.timezone.utc)
+        after_id = int(data.get('after_id') or 0)
+        with self.lock:
+            items = sorted(self.timebills.items(), key=lambda i: int(i[0]))
+        matches = [
+            (id, record) for id, record in items
+            if (not date or record['trandate'] == date)
+            and (not start or record['trandate'] >= start)
+            and (not end or record['trandate'] < end)
+            and (not since or record['modified'] > since)
+            and int(id) > after_id
+        ][:self.page_size]
+        if not data.get('columns'):
+            return [
+                dict(id=id, recordtype='timebill') for id, record in matches
+            ] or None
+        return [
+            dict(
+                id=id,
+                date=record['trandate'].isoformat(),
+                customer=record.get('customer', ''),
+                casetaskevent=record.get('casetaskevent', ''),
+                employee=record['employee'],
+                hours=float(record.get('hours') or 0),
+            )
+            for id, record in matches
+        ]
+
+    def delete_timebill(self, data, governance):
+        governance.consume(self.usage['delete'])
+        with self.lock:
+            if self.timebills.pop(data['id'], None) is None:
+                raise Failure(400, 'RCRD_DSNT_EXIST',
+                    'That record does not exist.')
+
+    def load_projects(self, data, governance):
+        governance.consume(self.usage['search'])
+        return self.projects
+
+    def create_allocation(self, data, governance):
+        governance.consume(self.usage['create'] + self.usage['submit'])
+        with self.lock:
+            allocation_id = next(self.ids)
+            self.allocations[str(allocation_id)] = data
+        return dict(status='success', id=allocation_id)
+
+
+class Governance:
+    """
+    Usage units remaining to a single restlet invocation.
+
+    >>> g = Governance(30)
+    >>> g.consume(20)
+    >>> g.consume(20)  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    yg.netsuite_fake.Failure: (400, 'SSS_USAGE_LIMIT_EXCEEDED', ...)
+    """
+    def __init__(self, remaining):
+        self.remaining = remaining
+
+    def consume(self, units):
+        self.remaining -= units
+        if self.remaining < 0:
+            raise Failure(400, 'SSS_USAGE_LIMIT_EXCEEDED',
+                'Script Execution Usage Limit Exceeded')
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    fake = None
+    "The FakeNetSuite served"
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        try:
+            status, data = self.fake.handle(
+                self.command, self.path, self.headers, body)
+        except Failure as failure:
+            status, data = failure.status, failure.json
+        except Exception as exc:
+            # as NetSuite reports an uncaught error in a restlet
+            message = '{0}: {1}'.format(type(exc).__name__, exc)
+            failure = Failure(500, 'UNEXPECTED_ERROR', message)
+            status, data = failure.status, failure.json
+        content_type = 'application/json'
+        if isinstance(data, str):
+            content_type, text = 'text/csv', data
+        else:
+            text = '' if data is None else json.dumps(data)
+        payload = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = respond
+
+    def log_message(self, format, *args):
+        pass
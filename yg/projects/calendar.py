@@ -6,80 +6,30 @@ import datetime
 import sys
 import itertools
 
-import workalendar.america
-import workalendar.europe
-from workalendar.core import Holiday
-import dateutil.parser
-import dateutil.relativedelta as rd
 
+lazy_names = (
+    'Vacation',
+    'YouGovAmericaCalendar',
+    'YouGovCalendar',
+)
+"Names provided by yg.projects.holidays, loaded on first access"
 
-class Vacation:
+
+def __getattr__(name):
     """
-    Mix-in for vacation_support
+    Resolve the workalendar-backed calendars on demand, so that importing
+    this module (for DateRange or month_days) doesn't import workalendar.
     """
-    vacation_days = ()
-
-    def is_working_day(self, day, *args, **kwargs):
-        parent_res = super().is_working_day(day, *args, **kwargs)
-        return parent_res and not self.is_vacation(day)
-
-    def is_vacation(self, day):
-        return day in self.vacation_days
-
-
-class YouGovAmericaCalendar(Vacation, workalendar.america.UnitedStates):
-    include_corpus_christi = False
-    hours_per_day = 8
-
-    FIXED_HOLIDAYS = workalendar.america.UnitedStates.FIXED_HOLIDAYS + (
-        Holiday(
-            datetime.date(2000, 12, 24), "Christmas Eve",
-            indication="December 24",
-            observance_shift=dict(weekday=rd.FR(-1)),
-        ),
-        Holiday(
-            datetime.date(2000, 12, 31), "New year's eve",
-            indication="December 31",
-            observance_shift=dict(weekday=rd.FR(-1)),
-        ),
-    )
-
-    def _add_days(self, year):
-        tg = datetime.date(year, 11, 1) + rd.relativedelta(weekday=rd.TH(4))
-        yield Holiday(
-            tg + datetime.timedelta(days=1),
-            "Day after Thanksgiving",
-            indication="Friday after Thanksgiving",
-        )
-
-    def _remove_days(self, days):
-        """
-        Remove days found in the US calendar not recognized by YG
-        """
-        to_remove = ['Colombus Day', 'Inauguration Day', 'Veterans Day']
-        return (
-            day for day in map(Holiday._from_resolved_definition, days)
-            if not day.name in to_remove
-        )
-
-    def get_variable_days(self, year):
-        days = super().get_variable_days(year)
-        return list(itertools.chain(days, self._add_days(year)))
-
-    def get_calendar_holidays(self, year):
-        days = super().get_calendar_holidays(year)
-        days = self._remove_days(days)
-        return list(days)
-
-
-class YouGovCalendar(Vacation, workalendar.europe.UnitedKingdom):
-    hours_per_day = 7.5
-
-    # todo: implement actual YouGov UK holidays
+    if name not in lazy_names:
+        msg = "module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg.format(__name__=__name__, name=name))
+    from . import holidays
+    return getattr(holidays, name)
 
 
 def print_holidays(cal=None):
-    cal = cal or YouGovAmericaCalendar()
+    from . import holidays
+    cal = cal or holidays.YouGovAmericaCalendar()
     year = int(sys.argv[1])
     print("= Holidays {year} =".format(**vars()), end='\n\n')
 
@@ -122,6 +72,78 @@ date_range = DateRange
 "alias for compatibility"
 
 
+class Registry(dict):
+    """
+    A map of each person to the calendar governing their working days,
+    such that a month for a whole company may be resolved with one pass
+    over the days per calendar rather than per person.
+
+    >>> class Weekdays:
+    ...     hours_per_day = 8
+    ...     def is_working_day(self, day):
+    ...         return day.weekday() < 5
+    >>> class UK(Weekdays):
+    ...     hours_per_day = 7.5
+    >>> us, uk = Weekdays(), UK()
+    >>> reg = Registry(jason=us, nitin=us, amy=uk)
+    >>> start = datetime.date(2014, 5, 16)
+    >>> days = DateRange(start, start + datetime.timedelta(days=4))
+    >>> reg.working_days('amy', days)
+    [datetime.date(2014, 5, 16), datetime.date(2014, 5, 19)]
+    >>> len(reg.masks(days))
+    2
+    >>> sorted(map(sorted, reg.people_by_calendar().values()))
+    [['amy'], ['jason', 'nitin']]
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._masks = {}
+
+    def people_by_calendar(self):
+        """
+        Return a map of each distinct calendar to the people using it.
+        """
+        people = {}
+        for person, cal in self.items():
+            people.setdefault(cal, []).append(person)
+        return people
+
+    def mask(self, cal, days):
+        """
+        Return a tuple of booleans indicating which of days (a DateRange)
+        are working days for cal, computed once per calendar and range.
+        """
+        key = cal, days.start, days.end
+        if key not in self._masks:
+            self._masks[key] = tuple(map(cal.is_working_day, days))
+        return self._masks[key]
+
+    def masks(self, days):
+        """
+        Return the mask for each distinct calendar over days.
+        """
+        calendars = self.people_by_calendar()
+        return {cal: self.mask(cal, days) for cal in calendars}
+
+    def working_days(self, person, days):
+        return list(itertools.compress(days, self.mask(self[person], days)))
+
+    def create_timebills(self, distributions, days):
+        """
+        Given a map of person to Distribution, return a map of person to
+        TimeBill covering that person's working days, at the
+        hours_per_day of their calendar.
+        """
+        masks = self.masks(days)
+        return {
+            person: dist.create_timebill(
+                itertools.compress(days, masks[self[person]]),
+                hours=self[person].hours_per_day,
+            )
+            for person, dist in distributions.items()
+        }
+
+
 def month_days(input):
     """
     Yield each day of a month indicated by the input month, such as 'May' or
@@ -147,6 +169,8 @@ def month_days(input):
     >>> isinstance(days[0], datetime.date)
     True
     """
+    import dateutil.parser
+    import dateutil.relativedelta as rd
     start = dateutil.parser.parse(input).replace(day=1).date()
     end = start + rd.relativedelta(months=1)
     return DateRange(start, end)
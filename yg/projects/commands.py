@@ -1,36 +1,128 @@
+import os
 import argparse
 
-import jaraco.util.logging
-import jaraco.util.timing
-from workalendar.core import Calendar
-
 import yg.netsuite
 from . import calendar
 from . import models
+from . import validation
+from . import profiling
+
+
+class DefaultCalendar:
+    """
+    A class attribute resolving to a workalendar.core calendar (plain
+    Calendar by default), constructed (and workalendar imported) only when
+    first accessed.
+    """
+    def __init__(self, name='Calendar'):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if not hasattr(self, 'calendar'):
+            import workalendar.core
+            self.calendar = getattr(workalendar.core, self.name)()
+        return self.calendar
+
+
+def load_catalog(fake=None):
+    """
+    Load the project catalog, from the FakeNetSuite if one is in use.
+    """
+    if fake:
+        url = fake.url + models.Projects.projects_loc
+        return models.Projects.from_url(url)
+    return models.Projects.from_url()
+
 
 class InteractiveEntry:
+    calendar = DefaultCalendar('WesternCalendar')
+    "A workalendar Calendar against which entered dates are validated"
+
     @classmethod
-    def submit_time(cls):
-        tb = yg.netsuite.TimeBill.solicit()
-        yg.netsuite.Credential().install()
-        tb.submit()
+    def submit_time(cls, complete=False, profile=None, fake=None):
+        profile = profile or profiling.Profile()
+        with profile.phase('catalog load'):
+            projects = load_catalog(fake)
+        if complete:
+            cls.install_completer(projects)
+        with profile.phase('solicitation'):
+            tb = yg.netsuite.TimeBill.solicit()
+        with profile.phase('validation'):
+            cls.validate(tb, projects)
+        with profile.phase('credential lookup'):
+            yg.netsuite.Credential().install()
+        with profile.phase('payload encoding'):
+            data = tb.encode()
+        with profile.phase('submit'):
+            tb.post(data)
 
     @classmethod
-    def get_args():
+    def validate(cls, tb, projects):
+        """
+        Check the entered timebill against the catalog and calendar
+        before anything is sent to NetSuite, reporting every problem and
+        exiting if any are more than warnings.
+        """
+        validator = validation.Validator.from_projects(projects, cls.calendar)
+        problems = validator(tb)
+        for problem in problems:
+            print(problem)
+        if not all(problem.warning for problem in problems):
+            raise SystemExit(1)
+
+    @staticmethod
+    def install_completer(projects):
+        """
+        Complete project names at the prompts with the tab key, where
+        readline is available.
+        """
+        try:
+            import readline
+        except ImportError:
+            return
+        index = projects.index
+        matches = []
+
+        def complete(text, state):
+            if state == 0:
+                matches[:] = index.complete(text)
+            return matches[state] if state < len(matches) else None
+
+        readline.set_completer_delims('')
+        readline.set_completer(complete)
+        readline.parse_and_bind('tab: complete')
+
+    @classmethod
+    def get_args(cls):
         """
         Parse command-line arguments, including the Command and its arguments.
         """
+        import jaraco.util.logging
         parser = argparse.ArgumentParser()
         jaraco.util.logging.add_arguments(parser)
         yg.netsuite.Sandbox.offer(parser)
+        yg.netsuite.Fake.offer(parser)
+        parser.add_argument('--complete', action='store_true',
+            help="Complete customer names at the prompt")
+        profiling.Profile.offer(parser)
         return parser.parse_args()
 
     @classmethod
     def run(cls):
-        args = cls.get_args()
+        profile = profiling.Profile()
+        with profile.phase('argument parsing'):
+            import jaraco.util.logging
+            args = cls.get_args()
+        profile.start(args)
         jaraco.util.logging.setup(args, format="%(message)s")
         jaraco.util.logging.setup_requests_logging(args.log_level)
-        cls.submit_time()
+        try:
+            cls.submit_time(complete=args.complete, profile=profile,
+                fake=args.fake)
+        finally:
+            profile.stop()
+        if args.profile or args.profile_memory:
+            profile.report()
 
 
 class TimeEntry:
@@ -38,36 +130,71 @@ class TimeEntry:
     A command-line entry point for automating time entry
     """
 
-    calendar = Calendar()
+    calendar = DefaultCalendar()
     "A workalendar Calendar instance suitable for resolving 'working days'"
 
+    distribution = None
+    "A models.DistributionTemplate, resolved once per catalog"
+
+    distribution_file = '~/.yg-distribution.json'
+    "Where the resolved distribution is saved between runs (None to not)"
+
     @classmethod
     def get_project_distribution(cls, projects):
         """
         Return a models.Distribution of models.Projects over which hours
         should be distributed.
         """
-        raise NotImplementedError("Distribution must be defined by subclass")
+        if cls.distribution is None:
+            msg = "Distribution must be defined by subclass"
+            raise NotImplementedError(msg)
+        filename = cls.distribution_file
+        if filename:
+            filename = os.path.expanduser(filename)
+        return cls.distribution.resolve(projects, filename)
 
     @staticmethod
     def get_args():
         parser = argparse.ArgumentParser()
         yg.netsuite.Sandbox.offer(parser)
+        yg.netsuite.Fake.offer(parser)
+        profiling.Profile.offer(parser)
         parser.add_argument('month', type=calendar.month_days)
         return parser.parse_args()
 
     @classmethod
     def run(cls):
-        args = cls.get_args()
-        days = filter(cls.calendar.is_working_day, args.month)
-        projects = models.Projects.from_url()
-        preferred_subsidiary = getattr(cls, 'prefer_subsidiary', '')
-        projects.prefer_subsidiary(preferred_subsidiary)
-        dist = cls.get_project_distribution(projects)
-        tb = dist.create_timebill(days, hours=cls.calendar.hours_per_day)
+        profile = profiling.Profile()
+        with profile.phase('argument parsing'):
+            args = cls.get_args()
+        profile.start(args)
+        try:
+            cls.submit_time(args.month, profile, fake=args.fake)
+        finally:
+            profile.stop()
+        if args.profile or args.profile_memory:
+            profile.report()
+
+    @classmethod
+    def submit_time(cls, month, profile, fake=None):
+        import jaraco.util.timing
+        with profile.phase('catalog load'):
+            projects = load_catalog(fake)
+            preferred_subsidiary = getattr(cls, 'prefer_subsidiary', '')
+            projects.prefer_subsidiary(preferred_subsidiary)
+        with profile.phase('distribution'):
+            dist = cls.get_project_distribution(projects)
+        with profile.phase('calendar filtering'):
+            days = list(filter(cls.calendar.is_working_day, month))
+        with profile.phase('timebill creation'):
+            tb = dist.create_timebill(days, hours=cls.calendar.hours_per_day)
         tmpl = "Submitting {len_tb} entries to {yg.netsuite.system}..."
         print(tmpl.format(len_tb=len(tb), yg=yg))
-        yg.netsuite.Credential().install()
+        with profile.phase('credential lookup'):
+            yg.netsuite.Credential().install()
+        with profile.phase('payload encoding'):
+            data = tb.encode()
         with jaraco.util.timing.Stopwatch() as watch:
-            tb.submit()
+            with profile.phase('submit'):
+                tb.post(data)
         print("Completed in", watch.elapsed)
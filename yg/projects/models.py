@@ -1,13 +1,53 @@
 import re
 import csv
+import json
+import bisect
+import collections
+import hashlib
+import functools
 import itertools
 import urllib.parse
 
-import requests
-
 import yg.netsuite
 
 
+def invalidates(method, *caches):
+    """
+    Wrap a mutating method such that it discards the named cached
+    attributes (held in vars, as Projects resolves unknown attributes by
+    name) before mutating.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        for cache in caches:
+            vars(self).pop(cache, None)
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+list_mutators = (
+    'append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort',
+    'reverse', '__setitem__', '__delitem__', '__iadd__', '__imul__',
+)
+dict_mutators = (
+    'update', 'pop', 'popitem', 'clear', 'setdefault', '__setitem__',
+    '__delitem__', '__ior__',
+)
+
+
+def invalidated_by(mutators, *caches):
+    """
+    Class decorator wrapping each of the named mutating methods (inherited
+    from the builtin base) to discard the named caches.
+    """
+    def decorate(cls):
+        # __ior__ is absent from dict before Python 3.9
+        for name in filter(functools.partial(hasattr, cls), mutators):
+            setattr(cls, name, invalidates(getattr(cls, name), *caches))
+        return cls
+    return decorate
+
+
 class Project:
     def __init__(self, **params):
         vars(self).update(params)
@@ -40,6 +80,7 @@ class ProjectId(str):
         return int(match.groupdict()['number'])
 
 
+@invalidated_by(list_mutators, '_version')
 class Projects(list):
     root = 'https://yg-public.s3.amazonaws.com/'
     projects_loc = '/r/13/AllProjectswithTasksResults192.csv'
@@ -51,12 +92,37 @@ class Projects(list):
 
     @classmethod
     def from_url(cls, url=projects_loc):
+        import requests
         url = urllib.parse.urljoin(cls.root, url)
         resp = requests.get(url, stream=True)
         resp.raise_for_status()
         lines = resp.iter_lines(decode_unicode=True)
         return cls(map(Project.from_dict, csv.DictReader(lines)))
 
+    @property
+    def version(self):
+        """
+        A stamp identifying the content and order of this catalog, used
+        to detect when a resolved distribution has gone stale. Computed
+        once and discarded when the list is mutated.
+
+        >>> ps = Projects([Project(name='Gryphon', id='a1')])
+        >>> v = ps.version
+        >>> ps.append(Project(name='Datum', id='b1'))
+        >>> ps.version == v
+        False
+        >>> ps.sort(key=lambda project: project.name)
+        >>> ps.version == v
+        False
+        """
+        if '_version' not in vars(self):
+            digest = hashlib.sha1()
+            for project in self:
+                line = '{id}\t{name}\n'.format_map(vars(project))
+                digest.update(line.encode('utf-8'))
+            vars(self)['_version'] = digest.hexdigest()
+        return vars(self)['_version']
+
     def best(self, short_name):
         """
         Return the best project for the supplied name
@@ -90,12 +156,51 @@ class Projects(list):
         And an ambiguous match should prefer the one that matches earliest.
         >>> ps.best('project')
         d1 anon project with long name
+
+        A name matching nothing raises NoMatch, suggesting near matches.
+        >>> ps.best('Griphon')
+        Traceback (most recent call last):
+        ...
+        yg.projects.models.NoMatch: No project matching 'Griphon' (did you mean a1 Gryphon, b1 Gryphon 4, c1 A Gryphon project?)
         """
         searches = map(ProjectSearch(short_name), self)
         matches = filter(None, searches)
-        matched = next(iter(sorted(matches)))
+        matched = next(iter(sorted(matches)), None)
+        if matched is None:
+            raise NoMatch(short_name, self)
         return matched.project
-    __getattr__ = best
+
+    def __getattr__(self, name):
+        """
+        Resolve unknown attributes as project names, but not private or
+        special names, which are probed by hasattr, copy, pickle and the
+        like.
+
+        >>> hasattr(Projects(), '_index')
+        False
+        """
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.best(name)
+
+    @property
+    def index(self):
+        """
+        A ProjectIndex of these projects, rebuilt when the catalog changes.
+        """
+        version = self.version
+        # vars, as attribute lookup falls back to best
+        if vars(self).get('_index_version') != version:
+            self._index = ProjectIndex(self)
+            self._index_version = version
+        return self._index
+
+    def search(self, query, k=10):
+        """
+        Return up to k projects matching query, best first. See
+        ProjectIndex.search.
+        """
+        return self.index.search(query, k)
 
     def prefer_subsidiary(self, subsidiary_prefix):
         """
@@ -118,6 +223,241 @@ class Projects(list):
         self.sort(key=by_subsidiary)
 
 
+class NoMatch(LookupError, AttributeError):
+    """
+    Raised when no project matches a name. Near matches are only sought
+    (building the catalog's index) when the suggestions are wanted, so
+    that probing for an attribute with hasattr stays cheap.
+    """
+    def __init__(self, name, projects=()):
+        super().__init__(name)
+        self.name = name
+        self.projects = projects
+
+    @property
+    def suggestions(self):
+        if not self.projects:
+            return []
+        return self.projects.search(self.name, k=3)
+
+    def __str__(self):
+        msg = "No project matching {0!r}".format(self.name)
+        if self.suggestions:
+            names = ', '.join(map(str, self.suggestions))
+            msg += " (did you mean {names}?)".format(**vars())
+        return msg
+
+
+class ProjectIndex:
+    """
+    An index of projects by name, answering prefix, token and approximate
+    (edit distance) queries without scanning the whole catalog.
+
+    >>> ps = Projects([
+    ...     Project(name='Gryphon', id='a1'),
+    ...     Project(name='Gryphon 4', id='b1'),
+    ...     Project(name='A Gryphon project', id='c1'),
+    ...     Project(name='Datum Omnibus', id='d1'),
+    ... ])
+    >>> index = ProjectIndex(ps)
+
+    Exact and prefix matches of the whole name rank first, shorter names
+    first, followed by matches of a word in the name.
+    >>> index.search('gryph')
+    [a1 Gryphon, b1 Gryphon 4, c1 A Gryphon project]
+    >>> index.search('omni')
+    [d1 Datum Omnibus]
+
+    Each word of the query may prefix a different word of the name.
+    >>> index.search('a gry proj')
+    [c1 A Gryphon project]
+
+    Words are also matched within other words.
+    >>> index.search('nibus')
+    [d1 Datum Omnibus]
+
+    Misspellings are found by edit distance.
+    >>> index.search('datm', k=1)
+    [d1 Datum Omnibus]
+
+    >>> index.complete('gryphon ')
+    ['b1 Gryphon 4']
+    """
+    tokenize = staticmethod(re.compile(r'\w+').findall)
+
+    def __init__(self, projects):
+        self.projects = list(projects)
+        self.names = [project.name.lower() for project in self.projects]
+        by_name = sorted(
+            (name, index) for index, name in enumerate(self.names))
+        self.sorted_names = [name for name, index in by_name]
+        self.sorted_indices = [index for name, index in by_name]
+        self.tokens = {}
+        "Map of each word to the indices of the projects containing it"
+        for index, name in enumerate(self.names):
+            for token in set(self.tokenize(name)):
+                self.tokens.setdefault(token, []).append(index)
+        self.vocabulary = sorted(self.tokens)
+        self.by_length = {}
+        self.bigrams = {}
+        self.trigrams = {}
+        "Map of each n-gram to the words containing it"
+        for word in self.vocabulary:
+            self.by_length.setdefault(len(word), []).append(word)
+            for bigram in self._ngrams(word, 2):
+                self.bigrams.setdefault(bigram, set()).add(word)
+            for trigram in self._ngrams(word, 3):
+                self.trigrams.setdefault(trigram, set()).add(word)
+
+    @staticmethod
+    def _ngrams(word, n):
+        return {word[pos:pos + n] for pos in range(len(word) - n + 1)}
+
+    @staticmethod
+    def _prefixed(items, prefix):
+        """
+        Return the range of positions in the sorted sequence of strings
+        whose items begin with prefix.
+        """
+        start = bisect.bisect_left(items, prefix)
+        end = start
+        while end < len(items) and items[end].startswith(prefix):
+            end += 1
+        return range(start, end)
+
+    def _names_prefixed(self, prefix):
+        """
+        Yield (name, index) for each project whose name begins with prefix.
+        """
+        for pos in self._prefixed(self.sorted_names, prefix):
+            yield self.sorted_names[pos], self.sorted_indices[pos]
+
+    def _token_matches(self, token):
+        """
+        Return the indices of projects with a word beginning with token.
+        """
+        positions = self._prefixed(self.vocabulary, token)
+        words = map(self.vocabulary.__getitem__, positions)
+        return set(itertools.chain.from_iterable(map(self.tokens.get, words)))
+
+    def _infix_matches(self, token):
+        """
+        Return the indices of projects with a word containing token (of
+        at least three characters), found through the trigram index.
+        """
+        postings = (
+            self.trigrams.get(trigram, set())
+            for trigram in self._ngrams(token, 3)
+        )
+        words = (word for word in set.intersection(*postings) if token in word)
+        return set(itertools.chain.from_iterable(map(self.tokens.get, words)))
+
+    def _fuzzy_matches(self, token):
+        """
+        Return a map of project indices to the edit distance between
+        token and the closest word in that project's name.
+        """
+        limit = max(1, len(token) // 3)
+        found = {}
+        for word in self._fuzzy_candidates(token, limit):
+            distance = edit_distance(token, word, limit)
+            if distance > limit:
+                continue
+            for index in self.tokens[word]:
+                found[index] = min(distance, found.get(index, distance))
+        return found
+
+    def _fuzzy_candidates(self, token, limit):
+        """
+        Yield the words of similar length which might be within limit
+        edits of token. Each edit removes at most two of the token's
+        distinct bigrams, so a word sharing fewer than that many
+        bigrams with the token cannot match.
+        """
+        lengths = range(len(token) - limit, len(token) + limit + 1)
+        bigrams = self._ngrams(token, 2)
+        threshold = len(bigrams) - 2 * limit
+        if threshold <= 0:
+            words = (self.by_length.get(length, []) for length in lengths)
+            yield from itertools.chain.from_iterable(words)
+            return
+        shared = collections.Counter(itertools.chain.from_iterable(
+            self.bigrams.get(bigram, ()) for bigram in bigrams))
+        for word, count in shared.items():
+            if count >= threshold and len(word) in lengths:
+                yield word
+
+    def search(self, query, k=10):
+        """
+        Return up to k projects matching query, best first. Within each
+        kind of match, results are ordered as SearchResult orders them:
+        earlier matches, then shorter names, then catalog order.
+        """
+        query = query.lower()
+        ranks = {}
+
+        def offer(index, kind, distance=0):
+            name = self.names[index]
+            start = max(name.find(query), 0)
+            rank = kind, distance, start, len(name), index
+            ranks[index] = min(rank, ranks.get(index, rank))
+
+        for name, index in self._names_prefixed(query):
+            offer(index, 0 if name == query else 1)
+        tokens = self.tokenize(query)
+        if tokens:
+            for index in set.intersection(*map(self._token_matches, tokens)):
+                offer(index, 2)
+        infixes = [token for token in tokens if len(token) >= 3]
+        if len(ranks) < k and infixes:
+            for index in set.intersection(*map(self._infix_matches, infixes)):
+                offer(index, 3)
+        # shorter words match too much of the vocabulary to be useful
+        misspelled = [token for token in tokens if len(token) >= 4]
+        if len(ranks) < k and misspelled:
+            fuzzy = list(map(self._fuzzy_matches, misspelled))
+            for index in set.intersection(*map(set, fuzzy)):
+                offer(index, 4, sum(found[index] for found in fuzzy))
+        best = sorted(ranks.values())[:k]
+        return [self.projects[rank[-1]] for rank in best]
+
+    def complete(self, text, k=10):
+        """
+        Return the customer strings (as used by Distribution) of projects
+        whose names begin with text.
+        """
+        matches = self._names_prefixed(text.lower())
+        ordered = sorted(matches, key=lambda item: (len(item[0]), item[1]))
+        return [str(self.projects[index]) for name, index in ordered[:k]]
+
+
+def edit_distance(a, b, limit=None):
+    """
+    Return the Levenshtein distance between a and b, or some value greater
+    than limit as soon as the distance is known to exceed it.
+
+    >>> edit_distance('gryphon', 'griphon')
+    1
+    >>> edit_distance('datum', 'dtaum')
+    2
+    >>> edit_distance('gryphon', 'datum', limit=2) > 2
+    True
+    """
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if limit is not None and min(current) > limit:
+            return min(current)
+        previous = current
+    return previous[-1]
+
+
 class ProjectSearch(str):
     def __call__(self, project):
         return SearchResult(re.search(self, project.name), project)
@@ -179,6 +519,13 @@ class Distribution(dict):
         portion = ratio*value
         return round(portion*self.resolution)/self.resolution
 
+    def shares(self, hours):
+        """
+        Return a list of (customer, hours) pairs for each project when
+        ``hours`` are distributed.
+        """
+        return [(str(proj), self.portion(proj, hours)) for proj in self]
+
     def create_timebill(self, days, hours=9):
         """
         Given a distribution of projects, apply that distribution to the
@@ -187,8 +534,137 @@ class Distribution(dict):
         return yg.netsuite.TimeBill(
             yg.netsuite.Entry(
                 date=day,
-                customer=str(proj),
-                hours=self.portion(proj, hours),
+                customer=customer,
+                hours=portion,
             )
-            for day, proj in itertools.product(days, self)
+            for day, (customer, portion)
+            in itertools.product(days, self.shares(hours))
         )
+
+
+@invalidated_by(dict_mutators, '_shares')
+class ResolvedDistribution(Distribution):
+    """
+    A Distribution keyed by customer strings, as resolved from a
+    DistributionTemplate against a catalog. The hours for each customer
+    are computed once per number of hours and reused thereafter.
+
+    >>> d = ResolvedDistribution({'foo': 2, 'bar': 1}, catalog_version='x')
+    >>> d.shares(11) is d.shares(11)
+    True
+
+    Changing a weight discards the computed shares.
+    >>> d['bar'] = 2
+    >>> d.shares(8)
+    [('foo', 4.0), ('bar', 4.0)]
+    >>> d['bar'] = 1
+    >>> restored = ResolvedDistribution.from_json(d.to_json())
+    >>> restored == d, restored.catalog_version
+    (True, 'x')
+    """
+    def __init__(self, *args, catalog_version=None, template=None,
+            **kwargs):
+        super().__init__(*args, **kwargs)
+        self.catalog_version = catalog_version
+        self.template = template
+        "The weights by project name or id from which this was resolved"
+
+    def shares(self, hours):
+        cache = vars(self).setdefault('_shares', {})
+        if hours not in cache:
+            cache[hours] = super().shares(hours)
+        return cache[hours]
+
+    def is_current(self, projects, template):
+        """
+        Was this resolved from template against this catalog?
+        """
+        return (self.template == template
+            and self.catalog_version == projects.version)
+
+    def to_json(self):
+        return json.dumps(dict(
+            catalog_version=self.catalog_version,
+            template=self.template,
+            distribution=self,
+        ))
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data['distribution'],
+            catalog_version=data['catalog_version'],
+            template=data.get('template'))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load a resolution saved by ``save``, or return None if there's
+        none to be had.
+        """
+        try:
+            with open(filename) as stream:
+                return cls.from_json(stream.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, filename):
+        with open(filename, 'w') as stream:
+            stream.write(self.to_json())
+
+
+@invalidated_by(dict_mutators, '_resolved')
+class DistributionTemplate(dict):
+    """
+    A distribution declared by project name or id, resolved against a
+    catalog once and reused across months and users.
+
+    >>> ps = Projects([
+    ...     Project(name='Gryphon', id='a1'),
+    ...     Project(name='Datum', id='b1'),
+    ... ])
+    >>> tmpl = DistributionTemplate(Gryphon=6, b1=4)
+    >>> dist = tmpl.resolve(ps)
+    >>> sorted(dist.items())
+    [('a1 Gryphon', 6), ('b1 Datum', 4)]
+
+    Resolving again against the same catalog does no searching.
+    >>> tmpl.resolve(ps) is dist
+    True
+
+    But a changed catalog (or template) is resolved afresh.
+    >>> ps.append(Project(name='Gryphon 4', id='c1'))
+    >>> tmpl.resolve(ps) is dist
+    False
+
+    Keys naming the same project have their weights combined.
+    >>> sorted(DistributionTemplate(Gryphon=1, a1=2).resolve(ps).items())
+    [('a1 Gryphon', 3)]
+    """
+    def resolve(self, projects, filename=None):
+        """
+        Return a ResolvedDistribution for this template in ``projects``,
+        reusing the previous resolution if the catalog is unchanged.
+
+        If filename is supplied, a resolution saved there (by a previous
+        run) is reused if it's current, and a fresh resolution is saved
+        there.
+        """
+        resolved = vars(self).get('_resolved')
+        if resolved is None and filename:
+            resolved = ResolvedDistribution.load(filename)
+        if resolved is not None and resolved.is_current(projects, self):
+            self._resolved = resolved
+            return resolved
+        by_id = {project.id: project for project in projects}
+        lookup = lambda key: by_id.get(key) or projects.best(key)
+        weights = {}
+        for key, weight in self.items():
+            customer = str(lookup(key))
+            weights[customer] = weights.get(customer, 0) + weight
+        resolved = ResolvedDistribution(weights,
+            catalog_version=projects.version, template=dict(self))
+        self._resolved = resolved
+        if filename:
+            resolved.save(filename)
+        return resolved
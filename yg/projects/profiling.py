@@ -0,0 +1,114 @@
+"""
+Per-phase timing for the command entry points.
+
+>>> profile = Profile()
+>>> with profile.phase('nothing'):
+...     pass
+>>> [name for name, elapsed, peak in profile.phases]
+['nothing']
+"""
+
+import sys
+import time
+import contextlib
+import tracemalloc
+
+
+class Profile:
+    """
+    Record the wall time of each phase of a run and, once started as
+    requested, the peak memory allocated during each phase and a cProfile
+    dump of the whole run.
+    """
+    def __init__(self):
+        self.phases = []
+        "(name, elapsed seconds, peak bytes or None) for each phase"
+        self.profiler = None
+        self.dump = None
+        self.tracing = False
+        self.overhead = []
+        "The instrumentation slowing the run, as noted in the report"
+
+    @staticmethod
+    def offer(parser):
+        """
+        Given an argparse parser, add the --profile, --profile-memory
+        and --profile-dump parameters.
+        """
+        parser.add_argument('--profile', action='store_true',
+            help="Report wall time by phase")
+        parser.add_argument('--profile-memory', action='store_true',
+            help="Also report peak memory by phase (tracing memory "
+            "slows the run)")
+        parser.add_argument('--profile-dump', metavar='FILE',
+            help="Also write cProfile stats to FILE (e.g. for snakeviz "
+            "or flameprof)")
+
+    def start(self, args):
+        """
+        Begin tracing memory and profiling, as requested by the parsed
+        args. Wall times are only free of their overhead with neither.
+        """
+        if args.profile_memory:
+            tracemalloc.start()
+            self.tracing = True
+            self.overhead.append('tracemalloc')
+        if args.profile_dump:
+            import cProfile
+            self.dump = args.profile_dump
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            self.overhead.append('cProfile')
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        peak = None
+        if self.tracing:
+            # reset the peak (reset_peak is 3.9+) so each phase reports
+            # only what it allocated
+            tracemalloc.clear_traces()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.tracing:
+                current, peak = tracemalloc.get_traced_memory()
+            self.phases.append((name, elapsed, peak))
+
+    def stop(self):
+        if self.profiler:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.dump)
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def report(self, stream=None):
+        """
+        >>> profile = Profile()
+        >>> profile.phases = [('catalog load', 1.25, 2048), ('submit', 2, None)]
+        >>> profile.report()
+        phase                  wall (s)  peak (KiB)
+        catalog load              1.250           2
+        submit                    2.000           -
+        total                     3.250
+
+        >>> profile.overhead = ['tracemalloc']
+        >>> profile.report()  # doctest: +ELLIPSIS
+        (wall times include tracemalloc overhead)
+        phase ...
+        """
+        stream = stream or sys.stdout
+        if self.overhead:
+            tmpl = "(wall times include {0} overhead)"
+            print(tmpl.format(' and '.join(self.overhead)), file=stream)
+        tmpl = "{0:<20} {1:>10} {2:>11}"
+        print(tmpl.format('phase', 'wall (s)', 'peak (KiB)'), file=stream)
+        for name, elapsed, peak in self.phases:
+            peak = '-' if peak is None else '{0:.0f}'.format(peak / 1024)
+            wall = '{0:.3f}'.format(elapsed)
+            print(tmpl.format(name, wall, peak), file=stream)
+        total = sum(elapsed for name, elapsed, peak in self.phases)
+        print(tmpl.format('total', '{0:.3f}'.format(total), '').rstrip(),
+            file=stream)
@@ -0,0 +1,230 @@
+"""
+Reporting over submitted time.
+
+Timebills are pulled from NetSuite in week-sized windows, concurrently,
+into a local columnar TimeStore, which answers group-by aggregations
+without further round trips.
+"""
+
+import array
+import datetime
+import itertools
+import collections
+import concurrent.futures
+
+import yg.netsuite
+from . import calendar
+
+
+def week(day):
+    """
+    The Monday beginning the week containing day.
+
+    >>> week(datetime.date(2014, 5, 17))
+    datetime.date(2014, 5, 12)
+    """
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def month(day):
+    """
+    >>> month(datetime.date(2014, 5, 17))
+    datetime.date(2014, 5, 1)
+    """
+    return day.replace(day=1)
+
+
+periods = dict(date=lambda day: day, week=week, month=month)
+"Functions grouping a date into a period"
+
+
+class TimeStore:
+    """
+    A columnar store of timebills.
+
+    >>> store = TimeStore()
+    >>> monday = datetime.date(2014, 5, 12)
+    >>> store.replace(monday, monday + datetime.timedelta(days=7), [
+    ...     dict(id='1', date='2014-05-12', customer='Gryphon',
+    ...         casetaskevent='', employee='Jason', hours=6),
+    ...     dict(id='2', date='2014-05-13', customer='Gryphon',
+    ...         casetaskevent='', employee='Nitin', hours=8),
+    ...     dict(id='3', date='2014-05-13', customer='Datum',
+    ...         casetaskevent='', employee='Jason', hours=2),
+    ... ])
+    >>> len(store)
+    3
+    >>> store.group_by('customer', 'week')
+    {('Gryphon', datetime.date(2014, 5, 12)): 14.0, ('Datum', datetime.date(2014, 5, 12)): 2.0}
+    >>> store.group_by('employee')
+    {('Jason',): 8.0, ('Nitin',): 8.0}
+
+    Replacing a window drops the rows previously in it.
+    >>> store.replace(monday, monday + datetime.timedelta(days=1), [])
+    >>> store.group_by('employee')
+    {('Nitin',): 8.0, ('Jason',): 2.0}
+    """
+    columns = 'id', 'customer', 'case_task_event', 'employee'
+
+    def __init__(self):
+        self.dates = array.array('l')
+        "Proleptic Gregorian ordinals"
+        self.hours = array.array('d')
+        for column in self.columns:
+            setattr(self, column, [])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def replace(self, start, end, rows):
+        """
+        Replace the timebills dated on or after start and before end with
+        rows, as returned by yg.netsuite.TimeBill.search.
+        """
+        self.replace_ranges([(start, end)], rows)
+
+    def replace_ranges(self, ranges, rows):
+        """
+        Replace the timebills dated in any of the (start, end) ranges with
+        rows, in a single pass over the store.
+        """
+        stale = {
+            ordinal
+            for start, end in ranges
+            for ordinal in range(start.toordinal(), end.toordinal())
+        }
+        keep = [
+            index for index, ordinal in enumerate(self.dates)
+            if ordinal not in stale
+        ]
+        self.dates = array.array('l', (self.dates[i] for i in keep))
+        self.hours = array.array('d', (self.hours[i] for i in keep))
+        for column in self.columns:
+            values = getattr(self, column)
+            setattr(self, column, [values[i] for i in keep])
+        for row in rows:
+            date = datetime.datetime.strptime(row['date'], '%Y-%m-%d')
+            self.dates.append(date.toordinal())
+            self.hours.append(float(row['hours']))
+            self.id.append(row['id'])
+            self.customer.append(row['customer'])
+            self.case_task_event.append(row['casetaskevent'])
+            self.employee.append(row['employee'])
+
+    def _key_column(self, key):
+        if key in periods:
+            period = periods[key]
+            # resolve each distinct date only once
+            resolved = {
+                ordinal: period(datetime.date.fromordinal(ordinal))
+                for ordinal in set(self.dates)
+            }
+            return map(resolved.__getitem__, self.dates)
+        return getattr(self, key)
+
+    def group_by(self, *keys):
+        """
+        Return total hours keyed by a tuple of the values for keys. Each
+        key is one of the columns or periods ('date', 'week', 'month').
+        """
+        totals = {}
+        key_columns = map(self._key_column, keys)
+        for key, hours in zip(zip(*key_columns), self.hours):
+            totals[key] = totals.get(key, 0) + hours
+        return totals
+
+    def utilization(self, cal, start, end, by='employee'):
+        """
+        Return, for each value of ``by``, the fraction of available hours
+        (cal.hours_per_day for each working day in [start, end)) that were
+        billed in that period. A period with no working days has no
+        utilization.
+        """
+        working_days = sum(
+            1 for day in calendar.DateRange(start, end)
+            if cal.is_working_day(day)
+        )
+        available = cal.hours_per_day * working_days
+        if not available:
+            return {}
+        lo, hi = start.toordinal(), end.toordinal()
+        billed = collections.defaultdict(float)
+        for key, ordinal, hours in zip(getattr(self, by), self.dates,
+                self.hours):
+            if lo <= ordinal < hi:
+                billed[key] += hours
+        return {key: hours / available for key, hours in billed.items()}
+
+
+class Report:
+    """
+    A TimeStore kept current with NetSuite.
+
+    The first refresh of a range fetches every week in it; subsequent
+    refreshes ask NetSuite only for timebills modified since the last
+    refresh and refetch just the weeks containing them. Deleted timebills
+    are only noticed when their week is refetched; pass force=True to
+    refetch everything.
+    """
+    workers = 8
+    "Concurrent requests to NetSuite"
+
+    skew = datetime.timedelta(hours=1)
+    "Allowance for drift between local and NetSuite clocks (sent as UTC)"
+
+    def __init__(self, store=None, search=yg.netsuite.TimeBill.search):
+        self.store = store or TimeStore()
+        self.search = search
+        self.fetched = set()
+        "Start dates of the weeks fetched"
+        self.last_refresh = None
+
+    @staticmethod
+    def windows(start, end):
+        """
+        >>> may = datetime.date(2014, 5, 1), datetime.date(2014, 6, 1)
+        >>> windows = list(Report.windows(*may))
+        >>> windows[0]
+        datetime.date(2014, 4, 28)
+        >>> len(windows)
+        5
+        """
+        window = week(start)
+        while window < end:
+            yield window
+            window += datetime.timedelta(days=7)
+
+    def refresh(self, start, end, force=False):
+        """
+        Bring the store current for timebills dated in [start, end).
+        """
+        # aware, so the cutoff is sent to NetSuite as UTC regardless of
+        # the local and account timezones
+        refreshed = datetime.datetime.now(datetime.timezone.utc)
+        windows = set(self.windows(start, end))
+        stale = windows if force else windows - self.fetched
+        if self.last_refresh and not force:
+            since = self.last_refresh - self.skew
+            changed = self.search(start, end, modified_since=since)
+            stale |= {week(self._date(row)) for row in changed}
+        pool = concurrent.futures.ThreadPoolExecutor(self.workers)
+        with pool:
+            fetches = {
+                window: pool.submit(self._fetch, window)
+                for window in sorted(stale)
+            }
+        ranges = [
+            (window, window + datetime.timedelta(days=7)) for window in fetches
+        ]
+        rows = itertools.chain.from_iterable(
+            fetch.result() for window, fetch in sorted(fetches.items()))
+        self.store.replace_ranges(ranges, rows)
+        self.fetched |= stale
+        self.last_refresh = refreshed
+
+    def _fetch(self, window):
+        return self.search(window, window + datetime.timedelta(days=7))
+
+    @staticmethod
+    def _date(row):
+        return datetime.datetime.strptime(row['date'], '%Y-%m-%d').date()
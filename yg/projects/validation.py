@@ -0,0 +1,150 @@
+"""
+Validate timebill entries locally, before any are sent to NetSuite.
+"""
+
+import collections
+
+
+class Problem(collections.namedtuple('Problem', 'entry message warning')):
+    """
+    A problem with an entry. Warnings are reported but don't prevent
+    submission.
+    """
+    __slots__ = ()
+
+    def __new__(cls, entry, message, warning=False):
+        return super().__new__(cls, entry, message, warning)
+
+    def __str__(self):
+        tmpl = "{entry.date} {entry.customer}: {message}"
+        if self.warning:
+            tmpl += " (warning)"
+        return tmpl.format_map(self._asdict())
+
+
+class ValidationError(ValueError):
+    """
+    Raised with the list of Problems found in a TimeBill.
+    """
+    def __init__(self, problems):
+        super().__init__(problems)
+        self.problems = problems
+
+    def __str__(self):
+        return '\n'.join(map(str, self.problems))
+
+
+class Validator:
+    """
+    Check entries against a project catalog and a calendar in a single
+    pass, reporting unknown customers, days exceeding the calendar's
+    hours_per_day (if it has one), and duplicate entries, and warning of
+    entries on non-working days (which NetSuite accepts). If a collection
+    of known tasks is supplied, unknown tasks are reported too; the
+    project catalog doesn't supply them.
+
+    >>> import datetime
+    >>> from yg.netsuite import Entry
+    >>> from yg.projects.models import Projects, Project
+    >>> class Calendar:
+    ...     hours_per_day = 8
+    ...     def is_working_day(self, day):
+    ...         return day.weekday() < 5
+    >>> ps = Projects([
+    ...     Project(name='Gryphon', id='a1', customer='SmartTech : Gryphon'),
+    ... ])
+    >>> v = Validator.from_projects(ps, Calendar())
+    >>> monday = datetime.date(2014, 5, 12)
+    >>> entries = [
+    ...     Entry(date=monday, customer='a1 Gryphon', hours=6),
+    ...     Entry(date=monday, customer='a1 Gryphon', hours=6),
+    ...     Entry(date=monday, customer='Datum', hours=1),
+    ...     Entry(date=monday + datetime.timedelta(days=5),
+    ...         customer='Gryphon', hours=1),
+    ... ]
+    >>> for problem in v(entries): print(problem)
+    2014-05-12 a1 Gryphon: Duplicate entry
+    2014-05-12 Datum: Unknown customer 'Datum'
+    2014-05-17 Gryphon: Not a working day (warning)
+    2014-05-12 Datum: 13 hours exceeds 8 hours per day
+
+    Only errors fail the check; the customer's NetSuite name is accepted.
+    >>> weekend = Entry(date=monday + datetime.timedelta(days=6),
+    ...     customer='SmartTech : Gryphon', hours=1)
+    >>> v.check(entries[:1] + [weekend])
+    """
+    customer_columns = 'customer', 'altname'
+    "Catalog columns holding the customer name NetSuite knows a project by"
+
+    def __init__(self, customers, calendar, tasks=None, tolerance=0):
+        self.customers = frozenset(customers)
+        self.calendar = calendar
+        self.tasks = frozenset(tasks) if tasks is not None else None
+        self.tolerance = tolerance
+        "Hours by which a day may exceed hours_per_day (e.g. rounding)"
+
+    @classmethod
+    def from_projects(cls, projects, calendar, **kwargs):
+        """
+        Construct a Validator accepting each project by name, by its
+        string representation (as used by Distribution), or by the
+        customer name NetSuite knows it by (e.g. "SmartTech : Gryphon"),
+        if the catalog carries one.
+        """
+        customers = set()
+        for project in projects:
+            customers.update((project.name, str(project)))
+            names = map(vars(project).get, cls.customer_columns)
+            customers.update(filter(None, names))
+        return cls(customers, calendar, **kwargs)
+
+    def __call__(self, entries):
+        """
+        Return a list of Problems found in entries.
+        """
+        problems = []
+        seen = set()
+        hours_by_day = collections.defaultdict(float)
+        last_by_day = {}
+        working = {}
+        for entry in entries:
+            key = entry.date, entry.customer, entry.case_task_event
+            if key in seen:
+                problems.append(Problem(entry, "Duplicate entry"))
+            seen.add(key)
+            if entry.customer not in self.customers:
+                msg = "Unknown customer {entry.customer!r}".format(**vars())
+                problems.append(Problem(entry, msg))
+            if (self.tasks is not None and entry.case_task_event
+                    and entry.case_task_event not in self.tasks):
+                msg = "Unknown task {entry.case_task_event!r}".format(
+                    **vars())
+                problems.append(Problem(entry, msg))
+            if entry.date not in working:
+                working[entry.date] = self.calendar.is_working_day(entry.date)
+            if not working[entry.date]:
+                problems.append(
+                    Problem(entry, "Not a working day", warning=True))
+            hours_by_day[entry.date] += float(entry.hours)
+            last_by_day[entry.date] = entry
+        problems.extend(self._check_hours(hours_by_day, last_by_day))
+        return problems
+
+    def _check_hours(self, hours_by_day, last_by_day):
+        limit = getattr(self.calendar, 'hours_per_day', None)
+        if limit is None:
+            return
+        for day, hours in sorted(hours_by_day.items()):
+            if hours > limit + self.tolerance:
+                tmpl = "{hours:g} hours exceeds {limit:g} hours per day"
+                yield Problem(last_by_day[day], tmpl.format(**vars()))
+
+    def check(self, entries):
+        """
+        Raise a ValidationError if any problems other than warnings are
+        found in entries.
+        """
+        problems = [problem for problem in self(entries)
+            if not problem.warning]
+        if problems:
+            raise ValidationError(problems)